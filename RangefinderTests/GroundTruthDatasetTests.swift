@@ -8,7 +8,8 @@
 //  Three tiers:
 //  - Tier 1 (always runs): Manifest-based fusion accuracy, confidence coverage,
 //    source selection distribution, per-band statistics, coverage validation.
-//  - Tier 2 (optional): Real depth map sampling accuracy.
+//  - Tier 2 (optional): Real depth map sampling accuracy, Kalman replay on
+//    exported ARKitScenes sequences.
 //  - Tier 3 (optional): Full pipeline with CoreML neural inference.
 //
 //  Reuses FusionSimulator, SensorNoiseModel, and SeededRNG from
@@ -52,12 +53,13 @@ final class GroundTruthDatasetTests: XCTestCase {
         }
     }
 
+    /// Independent samples only — digital-zoom variants are filtered out.
     private var samples: [GroundTruthSample] {
         guard let m = Self.manifest else {
             XCTFail(Self.loadError ?? "Manifest not loaded")
             return []
         }
-        return m.samples
+        return m.samples.filter { !$0.isZoomVariant }
     }
 
     // MARK: - Tier 1: Manifest Validation
@@ -71,8 +73,10 @@ final class GroundTruthDatasetTests: XCTestCase {
 
         XCTAssertGreaterThanOrEqual(m.total_samples, 5000,
             "Manifest should have at least 5,000 samples")
-        XCTAssertEqual(m.samples.count, m.total_samples,
+        XCTAssertEqual(samples.count, m.total_samples,
             "Sample count should match total_samples field")
+        XCTAssertEqual(m.samples.count, m.total_samples + (m.zoom_variants ?? 0),
+            "Manifest should hold total_samples plus zoom_variants entries")
         XCTAssertFalse(m.dataset_sources.isEmpty,
             "Should have at least one dataset source")
 
@@ -640,6 +644,66 @@ final class GroundTruthDatasetTests: XCTestCase {
             "Median center-patch CV \(String(format: "%.3f", medianCV)) should be < 0.10")
     }
 
+    // MARK: - Tier 2: Temporal Sequence Replay (optional)
+
+    /// Replay real ARKitScenes LiDAR center readings through the Kalman
+    /// filter and compare raw vs filtered error against laser-scanner GT.
+    /// Requires RANGEFINDER_DATASET_PATH with a sequences/ export.
+    func testKalmanReplayOnRealSequences() throws {
+        guard let datasetPath = ProcessInfo.processInfo.environment["RANGEFINDER_DATASET_PATH"] else {
+            throw XCTSkip("RANGEFINDER_DATASET_PATH not set — skipping sequence replay tests")
+        }
+
+        guard let loaded = loadGroundTruthSequences(datasetPath: datasetPath) else {
+            throw XCTSkip("Sequences not found — run prepare_ground_truth_dataset.py --sequences")
+        }
+        let index = loaded.index
+
+        var rawErrors: [Float] = []
+        var filteredErrors: [Float] = []
+
+        for record in index.sequences.prefix(500) {  // Cap at 500 for speed
+            guard let seq = decodeSequence(record, blob: loaded.blob) else { continue }
+
+            var kf = DepthKalmanFilter()
+            for i in 0..<record.num_frames {
+                let lidar = seq.lidarCenter[i]
+                let gt = seq.groundTruthCenter[i]
+                guard lidar.isFinite, lidar > 0.1 else { continue }
+
+                let filtered = kf.update(
+                    measurement: Double(lidar),
+                    confidence: 0.9,
+                    motionState: .tracking,
+                    timestamp: record.t0_s + Double(seq.timestamps[i])
+                )
+
+                guard gt.isFinite, gt > 0.3 else { continue }
+                rawErrors.append(abs(lidar - gt) / gt * 100.0)
+                filteredErrors.append(abs(Float(filtered) - gt) / gt * 100.0)
+            }
+        }
+
+        guard !rawErrors.isEmpty else {
+            throw XCTSkip("No valid LiDAR/GT pairs in exported sequences")
+        }
+
+        let rawSorted = rawErrors.sorted()
+        let filteredSorted = filteredErrors.sorted()
+        let rawP50 = rawSorted[rawSorted.count / 2]
+        let filteredP50 = filteredSorted[filteredSorted.count / 2]
+        let filteredP90 = filteredSorted[min(filteredSorted.count - 1, Int(Double(filteredSorted.count) * 0.9))]
+
+        print("\n=== KALMAN REPLAY ON REAL SEQUENCES ===")
+        print(String(format: "  Sequences: %d, frames: %d", index.total_sequences, rawErrors.count))
+        print(String(format: "  Raw LiDAR P50 error: %.2f%%", rawP50))
+        print(String(format: "  Filtered P50 error: %.2f%%", filteredP50))
+        print(String(format: "  Filtered P90 error: %.2f%%", filteredP90))
+
+        XCTAssertLessThan(filteredP50, rawP50 * 1.5 + 1.0,
+            "Kalman filtering should not materially degrade LiDAR accuracy on real sequences")
+    }
+
     // MARK: - Tier 3: Full Pipeline (optional)
 
     /// Run neural model on real images and compare to ground truth.
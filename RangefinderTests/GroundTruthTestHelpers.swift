@@ -17,6 +17,8 @@ struct IntrinsicsData: Codable {
     let fy: Double
     let cx: Double
     let cy: Double
+    let width: Int?     // Frame the intrinsics are in (ARKitScenes lowres_wide); nil = image_width
+    let height: Int?
 }
 
 struct GroundTruthSample: Codable {
@@ -33,6 +35,14 @@ struct GroundTruthSample: Codable {
     let distance_band: String    // "close" | "near_mid" | "mid" | "far_mid" | "far" | "long"
     let depth_map_file: String?
     let image_file: String?
+    let zoom_factor: Float?          // > 1 for digital-zoom variants (absent in older manifests)
+    let source_frame_id: String?     // Frame a zoom variant was cropped from
+
+    /// Digital-zoom augmentation derived from another sample's frame.
+    /// Not an independent observation — excluded from per-band statistics.
+    var isZoomVariant: Bool {
+        (zoom_factor ?? 1.0) != 1.0
+    }
 }
 
 struct DistanceBandInfo: Codable {
@@ -45,7 +55,8 @@ struct GroundTruthManifest: Codable {
     let version: String
     let generated_date: String
     let dataset_sources: [String]
-    let total_samples: Int
+    let total_samples: Int           // Independent frames; zoom variants excluded
+    let zoom_variants: Int?          // Absent in older manifests
     let distance_bands: [String: DistanceBandInfo]
     let samples: [GroundTruthSample]
 }
@@ -239,3 +250,79 @@ func formatBandReport(_ stats: [String: BandStatistics]) -> String {
 
     return lines.joined(separator: "\n")
 }
+
+// MARK: - Temporal Sequences
+
+/// One contiguous frame run in sequences.bin (see prepare_ground_truth_dataset.py --sequences).
+struct GroundTruthSequenceRecord: Codable {
+    let sequence_id: String
+    let dataset: String
+    let video_id: String
+    let first_frame: String
+    let last_frame: String
+    let num_frames: Int
+    let t0_s: Double
+    let offset: Int
+    let depth_size: Int
+    let intrinsics: IntrinsicsData?
+}
+
+struct GroundTruthSequenceIndex: Codable {
+    let version: String
+    let generated_date: String
+    let dtype: String
+    let byte_order: String
+    let fields: [String]
+    let total_sequences: Int
+    let total_frames: Int
+    let sequences: [GroundTruthSequenceRecord]
+}
+
+/// Decoded time series for one sequence. Center values are NaN where the
+/// 5×5 center patch had no valid depth.
+struct GroundTruthSequence {
+    let record: GroundTruthSequenceRecord
+    let timestamps: [Float]           // Seconds since record.t0_s
+    let groundTruthCenter: [Float]
+    let lidarCenter: [Float]
+    let depthMaps: [Float]            // num_frames × depth_size², empty if not exported
+}
+
+/// Load sequences.json and the packed sequences.bin from `<datasetPath>/sequences`.
+func loadGroundTruthSequences(datasetPath: String) -> (index: GroundTruthSequenceIndex, blob: Data)? {
+    let seqDir = (datasetPath as NSString).appendingPathComponent("sequences")
+    let indexPath = (seqDir as NSString).appendingPathComponent("sequences.json")
+    let blobPath = (seqDir as NSString).appendingPathComponent("sequences.bin")
+
+    guard let indexData = FileManager.default.contents(atPath: indexPath),
+          let blob = try? Data(contentsOf: URL(fileURLWithPath: blobPath), options: .alwaysMapped) else {
+        return nil
+    }
+
+    do {
+        let index = try JSONDecoder().decode(GroundTruthSequenceIndex.self, from: indexData)
+        return (index, blob)
+    } catch {
+        print("⚠ Failed to decode sequence index at \(indexPath): \(error)")
+        return nil
+    }
+}
+
+/// Slice one record's arrays out of the packed little-endian Float32 blob.
+func decodeSequence(_ record: GroundTruthSequenceRecord, blob: Data) -> GroundTruthSequence? {
+    let n = record.num_frames
+    let depthCount = n * record.depth_size * record.depth_size
+    let byteCount = (3 * n + depthCount) * MemoryLayout<Float>.size
+    guard record.offset >= 0, record.offset + byteCount <= blob.count else { return nil }
+
+    let floats: [Float] = blob.subdata(in: record.offset..<(record.offset + byteCount))
+        .withUnsafeBytes { ptr in Array(ptr.bindMemory(to: Float.self)) }
+
+    return GroundTruthSequence(
+        record: record,
+        timestamps: Array(floats[0..<n]),
+        groundTruthCenter: Array(floats[n..<(2 * n)]),
+        lidarCenter: Array(floats[(2 * n)..<(3 * n)]),
+        depthMaps: Array(floats[(3 * n)...])
+    )
+}
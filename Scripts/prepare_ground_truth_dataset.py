@@ -15,11 +15,33 @@ Usage:
   python prepare_ground_truth_dataset.py --output ./GroundTruthData --tier 2
   python prepare_ground_truth_dataset.py --output ./GroundTruthData --tier 3
 
+Dataset trees under --data-dir are walked once with os.scandir and cached in
+<data-dir>/.rangefinder_index.npz; later runs only rescan scenes whose
+directory mtimes changed (--rebuild-index forces a full walk).
+
+Scenes are processed in quota-driven order by default: each scene is probed
+with a few GT decodes and scenes that fill the scarcest bands run first; the
+run stops when no scene is estimated to fill an open band (--exhaustive
+sweeps the rest; --schedule directory restores ARKitScenes-then-DIODE
+directory order).
+Decode counts are written to <output>/run_report.json.
+
+--zoom-factors 1.5,2,4 adds digital-zoom (center-crop) variants of every
+accepted frame, marked with zoom_factor / source_frame_id in the manifest.
+
+Temporal sequences (for replaying the Kalman / IMU / smoothing stages):
+  python prepare_ground_truth_dataset.py --output ./Seq --data-dir ./data --sequences
+  writes sequences/sequences.bin (packed float32 time series) plus
+  sequences/sequences.json (per-sequence offsets, timestamps, intrinsics).
+
 Tiers:
   1: Manifest only (~5MB) — extracts per-frame ground truth distances
   2: + Downscaled depth maps (~500MB)
   3: + Downscaled RGB images (~5GB)
 
+Upgrading an existing manifest (same samples, no re-extraction):
+  python prepare_ground_truth_dataset.py materialize --output ./GroundTruthData --tier 2
+
 Dependencies: numpy, Pillow, requests
   pip install numpy Pillow requests
 """
@@ -31,6 +53,7 @@ import struct
 import sys
 import hashlib
 import random
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, Dict, List, Tuple
@@ -101,6 +124,13 @@ class GroundTruthSample:
     distance_band: str = "close"
     depth_map_file: Optional[str] = None
     image_file: Optional[str] = None
+    # Source files relative to the data dir ("depth", optional "mask"/"rgb"),
+    # used by `materialize` to add tier 2/3 outputs without re-extraction
+    source_files: Optional[Dict[str, str]] = None
+    # Digital-zoom augmentation: variants have zoom_factor > 1 and point
+    # back at the sample they were cropped from
+    zoom_factor: float = 1.0
+    source_frame_id: Optional[str] = None
 
 
 def classify_distance(distance_m: float) -> Optional[str]:
@@ -145,12 +175,694 @@ def compute_percentiles(depth_map: np.ndarray) -> Tuple[Optional[float], Optiona
     return float(np.percentile(valid, 25)), float(np.percentile(valid, 75))
 
 
+# ─────────────────────────────────────────────────────────────────────
+# Dataset Index (single os.scandir walk, cached between runs)
+# ─────────────────────────────────────────────────────────────────────
+
+INDEX_VERSION = 2
+INDEX_CACHE_NAME = ".rangefinder_index.npz"
+
+# Per-dataset frame layout: role -> (directory relative to the scene root,
+# filename suffix appended to the frame stem). The first role is the
+# primary file — a frame exists in the index only if its primary file does.
+DATASET_LAYOUTS = {
+    "arkitscenes": {
+        "lidar":  ("{scene}_frames/lowres_depth", ".png"),
+        "gt":     ("{scene}_offline_prepared_data/highres_depth", ".png"),
+        "pincam": ("{scene}_frames/lowres_wide_intrinsics", ".pincam"),
+        "rgb":    ("{scene}_frames/lowres_wide", ".jpg"),
+    },
+    "diode": {
+        "depth":  ("", "_depth.npy"),
+        "mask":   ("", "_depth_mask.npy"),
+        "rgb":    ("", ".png"),
+    },
+}
+
+
+@dataclass
+class IndexedScene:
+    """
+    One scene (ARKitScenes video / DIODE scan) as recorded in the index.
+
+    Frames are stored column-wise: `frames` holds the sorted stems and, per
+    role, `present[role]` (bool), `sizes[role]` and `mtimes[role]` (int64,
+    0 where the companion file is missing) are arrays over those frames.
+    """
+    dataset: str
+    split: str
+    env_type: str
+    scene: str
+    scan: str
+    root: str                       # Scene root, relative to data_dir
+    dir_mtimes: Dict[str, Optional[int]] = field(default_factory=dict)
+    frames: List[str] = field(default_factory=list)
+    present: Dict[str, np.ndarray] = field(default_factory=dict)
+    sizes: Dict[str, np.ndarray] = field(default_factory=dict)
+    mtimes: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def has(self, role: str, i: int) -> bool:
+        return bool(self.present[role][i])
+
+    def path(self, data_dir: Path, role: str, i: int) -> Path:
+        subdir, suffix = DATASET_LAYOUTS[self.dataset][role]
+        return (data_dir / self.root / subdir.format(scene=self.scene)
+                / f"{self.frames[i]}{suffix}")
+
+
+@dataclass
+class DatasetIndex:
+    """Filesystem index of all dataset trees under a data directory."""
+    data_dir: str
+    version: int = INDEX_VERSION
+    # Container directory listings: relpath -> [mtime_ns, [subdir names]]
+    listings: Dict[str, list] = field(default_factory=dict)
+    scenes: List[IndexedScene] = field(default_factory=list)
+
+    def scenes_for(self, dataset: str) -> List[IndexedScene]:
+        return [s for s in self.scenes if s.dataset == dataset]
+
+
+def _dir_mtime(path: Path) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _scan_files(path: Path) -> Dict[str, Tuple[int, int]]:
+    """List regular files in one directory with a single scandir call."""
+    files = {}
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_file():
+                    st = entry.stat()
+                    files[entry.name] = (st.st_size, st.st_mtime_ns)
+    except OSError:
+        pass
+    return files
+
+
+def _list_subdirs(data_dir: Path, rel: str, index: DatasetIndex,
+                  previous: Optional[DatasetIndex]) -> List[str]:
+    """Sorted subdirectory names of a container, reused if its mtime is unchanged."""
+    mtime = _dir_mtime(data_dir / rel)
+    cached = previous.listings.get(rel) if previous else None
+    if cached is not None and cached[0] == mtime:
+        names = cached[1]
+    elif mtime is None:
+        names = []
+    else:
+        try:
+            with os.scandir(data_dir / rel) as it:
+                names = sorted(e.name for e in it if e.is_dir())
+        except OSError:
+            names = []
+    index.listings[rel] = [mtime, names]
+    return names
+
+
+def _index_scene(data_dir: Path, scene: IndexedScene) -> IndexedScene:
+    """Populate directory mtimes and the frame table for one scene."""
+    layout = DATASET_LAYOUTS[scene.dataset]
+    root = data_dir / scene.root
+    listings: Dict[str, Dict[str, Tuple[int, int]]] = {}
+
+    for subdir_fmt, _ in layout.values():
+        subdir = subdir_fmt.format(scene=scene.scene)
+        parts = Path(subdir).parts
+        for k in range(len(parts) + 1):
+            rel = "/".join(parts[:k])
+            if rel not in scene.dir_mtimes:
+                scene.dir_mtimes[rel] = _dir_mtime(root / rel)
+        if subdir not in listings:
+            exists = scene.dir_mtimes[subdir] is not None
+            listings[subdir] = _scan_files(root / subdir) if exists else {}
+
+    roles = list(layout)
+    primary_dir, primary_suffix = layout[roles[0]]
+    primary = listings[primary_dir.format(scene=scene.scene)]
+    names = sorted(n for n in primary if n.endswith(primary_suffix))
+    scene.frames = [n[:-len(primary_suffix)] for n in names]
+
+    for role in roles:
+        subdir_fmt, suffix = layout[role]
+        listing = listings[subdir_fmt.format(scene=scene.scene)]
+        stats = [listing.get(f"{stem}{suffix}", (-1, 0)) for stem in scene.frames]
+        table = np.array(stats, dtype=np.int64).reshape(-1, 2)
+        scene.present[role] = table[:, 0] >= 0
+        scene.sizes[role] = np.maximum(table[:, 0], 0)
+        scene.mtimes[role] = table[:, 1]
+
+    return scene
+
+
+def _scene_is_fresh(data_dir: Path, scene: IndexedScene) -> bool:
+    root = data_dir / scene.root
+    return all(_dir_mtime(root / rel) == mtime
+               for rel, mtime in scene.dir_mtimes.items())
+
+
+def build_dataset_index(data_dir: Path,
+                        previous: Optional[DatasetIndex] = None
+                        ) -> Tuple[DatasetIndex, int, int]:
+    """
+    Walk the ARKitScenes and DIODE trees once with os.scandir.
+
+    Scenes from `previous` whose recorded directory mtimes still match are
+    reused without listing their frames again. Returns the index plus
+    (reused, rescanned) scene counts.
+    """
+    index = DatasetIndex(data_dir=str(data_dir.resolve()))
+    cached = {s.root: s for s in previous.scenes} if previous else {}
+    reused = rescanned = 0
+
+    def add(scene: IndexedScene):
+        nonlocal reused, rescanned
+        old = cached.get(scene.root)
+        if old is not None and _scene_is_fresh(data_dir, old):
+            index.scenes.append(old)
+            reused += 1
+        else:
+            index.scenes.append(_index_scene(data_dir, scene))
+            rescanned += 1
+
+    # ARKitScenes: 3dod/<split>/<video_id>/
+    for split in _list_subdirs(data_dir, "3dod", index, previous):
+        split_rel = f"3dod/{split}"
+        for video_id in _list_subdirs(data_dir, split_rel, index, previous):
+            add(IndexedScene(
+                dataset="arkitscenes", split=split, env_type="indoor",
+                scene=video_id, scan="", root=f"{split_rel}/{video_id}",
+            ))
+
+    # DIODE: diode/<split>/<env>/<scene>/<scan>/
+    for split in ["val", "train"]:
+        for env_type in ["indoor", "outdoor"]:
+            env_rel = f"diode/{split}/{env_type}"
+            for scene_name in _list_subdirs(data_dir, env_rel, index, previous):
+                scene_rel = f"{env_rel}/{scene_name}"
+                for scan_name in _list_subdirs(data_dir, scene_rel, index, previous):
+                    add(IndexedScene(
+                        dataset="diode", split=split, env_type=env_type,
+                        scene=scene_name, scan=scan_name,
+                        root=f"{scene_rel}/{scan_name}",
+                    ))
+
+    return index, reused, rescanned
+
+
+INDEX_COLUMNS = ("present", "sizes", "mtimes")
+SCENE_META_FIELDS = ("dataset", "split", "env_type", "scene", "scan", "root", "dir_mtimes")
+
+
+def save_dataset_index(index: DatasetIndex, cache_path: Path):
+    """
+    Write the index as one .npz: scene metadata, listings and dir mtimes as a
+    JSON string, frame stems as one newline-joined UTF-8 blob, and each
+    dataset/role column concatenated over that dataset's scenes.
+    """
+    meta = {
+        "version": index.version,
+        "data_dir": index.data_dir,
+        "listings": index.listings,
+        "scenes": [dict({k: getattr(s, k) for k in SCENE_META_FIELDS},
+                        n_frames=len(s.frames)) for s in index.scenes],
+    }
+    arrays = {
+        "meta": np.array(json.dumps(meta, separators=(",", ":"))),
+        "frames": np.frombuffer(
+            "\n".join(stem for s in index.scenes for stem in s.frames).encode(), dtype=np.uint8),
+    }
+    for dataset, layout in DATASET_LAYOUTS.items():
+        scenes = index.scenes_for(dataset)
+        for role in layout:
+            for col in INDEX_COLUMNS:
+                empty = np.zeros(0, dtype=bool if col == "present" else np.int64)
+                arrays[f"{dataset}.{role}.{col}"] = np.concatenate(
+                    [empty] + [getattr(s, col)[role] for s in scenes])
+
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp_path, cache_path)
+
+
+def read_dataset_index(cache_path: Path) -> DatasetIndex:
+    """Inverse of save_dataset_index; scene columns are views into the loaded arrays."""
+    with np.load(cache_path, allow_pickle=False) as npz:
+        meta = json.loads(str(npz["meta"]))
+        stems = npz["frames"].tobytes().decode().split("\n")
+        columns = {key: npz[key] for key in npz.files if key not in ("meta", "frames")}
+
+    index = DatasetIndex(data_dir=meta["data_dir"], version=meta["version"],
+                         listings=meta["listings"])
+    frame_pos = 0
+    role_pos = {dataset: 0 for dataset in DATASET_LAYOUTS}
+    for m in meta["scenes"]:
+        n = m.pop("n_frames")
+        scene = IndexedScene(**m, frames=stems[frame_pos:frame_pos + n])
+        start = role_pos[scene.dataset]
+        for role in DATASET_LAYOUTS[scene.dataset]:
+            for col in INDEX_COLUMNS:
+                getattr(scene, col)[role] = columns[f"{scene.dataset}.{role}.{col}"][start:start + n]
+        frame_pos += n
+        role_pos[scene.dataset] += n
+        index.scenes.append(scene)
+    return index
+
+
+def load_dataset_index(data_dir: Path, cache_path: Path,
+                       rebuild: bool = False) -> DatasetIndex:
+    """Load the cached index, refresh stale scenes, and write it back."""
+    previous = None
+    if not rebuild and cache_path.exists():
+        try:
+            previous = read_dataset_index(cache_path)
+            if (previous.version != INDEX_VERSION
+                    or previous.data_dir != str(data_dir.resolve())):
+                previous = None
+        except (OSError, ValueError, KeyError, TypeError):
+            previous = None  # Corrupt or foreign cache — rebuild
+
+    index, reused, rescanned = build_dataset_index(data_dir, previous)
+    n_frames = sum(len(s.frames) for s in index.scenes)
+    print(f"  Index: {len(index.scenes)} scenes, {n_frames} frames "
+          f"({reused} reused, {rescanned} scanned)")
+
+    if rescanned or previous is None or index.listings != previous.listings:
+        try:
+            save_dataset_index(index, cache_path)
+        except OSError as e:
+            print(f"  WARNING: could not write index cache {cache_path}: {e}")
+
+    return index
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Run Statistics
+# ─────────────────────────────────────────────────────────────────────
+
+@dataclass
+class RunStats:
+    """Decode accounting for one extraction run (written to run_report.json)."""
+    schedule: str = "directory"
+    decodes: int = 0                    # GT depth maps decoded, probes included
+    probe_decodes: int = 0
+    # Decodes a directory-order run with the same bands_full early stop
+    # makes; estimated (see estimate_directory_order_decodes) for quota runs
+    directory_order_decodes: int = 0
+    directory_order_estimated: bool = False
+    scenes_total: int = 0
+    scenes_processed: int = 0
+
+    @property
+    def decodes_saved(self) -> int:
+        return self.directory_order_decodes - self.decodes
+
+
+def bands_full(band_counts: Dict[str, int]) -> bool:
+    """True once every band has reached its BAND_TARGETS quota."""
+    return all(band_counts.get(b, 0) >= BAND_TARGETS[b] for b in DISTANCE_BANDS)
+
+
+def scene_candidates(scene: IndexedScene) -> List[int]:
+    """Frame indices of a scene that extraction would decode."""
+    if scene.dataset == "arkitscenes":
+        # Every 10th frame (ARKit runs at 60fps, plenty of redundancy)
+        return [i for i in range(0, len(scene.frames), 10) if scene.has("gt", i)]
+    return list(range(len(scene.frames)))
+
+
+# Manifest source_files key -> index role, per dataset
+SOURCE_ROLES = {
+    "arkitscenes": {"depth": "gt", "rgb": "rgb"},
+    "diode": {"depth": "depth", "mask": "mask", "rgb": "rgb"},
+}
+
+
+def source_files(scene: IndexedScene, i: int) -> Dict[str, str]:
+    """Data-dir-relative paths of the files a sample was extracted from."""
+    return {key: scene.path(Path(), role, i).as_posix()
+            for key, role in SOURCE_ROLES[scene.dataset].items()
+            if scene.has(role, i)}
+
+
+def load_ground_truth_file(dataset: str, depth_file: Path,
+                           mask_file: Optional[Path] = None) -> np.ndarray:
+    """Decode a ground truth depth file to float32 meters."""
+    if dataset == "arkitscenes":
+        # 16-bit PNG, values in mm
+        gt_img = np.array(Image.open(depth_file))
+        return gt_img.astype(np.float32) / 1000.0
+
+    depth_map = np.load(depth_file).squeeze()
+    if mask_file is not None:
+        mask = np.load(mask_file).squeeze().astype(bool)
+        depth_map = np.where(mask, depth_map, 0)
+    return depth_map.astype(np.float32)
+
+
+def load_ground_truth(scene: IndexedScene, data_dir: Path, i: int) -> np.ndarray:
+    """Decode the ground truth depth map (float32, meters) for frame i."""
+    files = source_files(scene, i)
+    mask = data_dir / files["mask"] if "mask" in files else None
+    return load_ground_truth_file(scene.dataset, data_dir / files["depth"], mask)
+
+
+def read_pincam(path: Path) -> Optional[Dict[str, float]]:
+    """
+    Parse an ARKitScenes .pincam intrinsics file; None if it is malformed.
+
+    The file holds "width height fx fy cx cy" for the lowres_wide frame, so
+    the returned width/height give the pixel units of fx/fy/cx/cy (they are
+    not in image_width × image_height units). A bare "fx fy cx cy" is also
+    accepted.
+    """
+    with open(path) as f:
+        vals = list(map(float, f.read().strip().split()))
+    if len(vals) >= 6:
+        width, height, fx, fy, cx, cy = vals[:6]
+        return {"fx": fx, "fy": fy, "cx": cx, "cy": cy,
+                "width": int(width), "height": int(height)}
+    if len(vals) == 4:
+        return {"fx": vals[0], "fy": vals[1], "cx": vals[2], "cy": vals[3]}
+    return None
+
+
+def save_depth_bin(depth: np.ndarray, output_dir: Path, frame_id: str) -> str:
+    """Save an already-downscaled depth map as raw float32; returns its manifest path."""
+    depth_out = output_dir / "depth" / f"{frame_id}.bin"
+    depth_out.parent.mkdir(parents=True, exist_ok=True)
+    depth.astype(np.float32).tofile(depth_out)
+    return f"depth/{frame_id}.bin"
+
+
+def write_depth_map(gt_depth_m: np.ndarray, output_dir: Path, frame_id: str) -> str:
+    """Tier 2: save a DEPTH_MAP_SIZE² float32 depth map; returns its manifest path."""
+    resized = np.array(
+        Image.fromarray(gt_depth_m).resize(
+            (DEPTH_MAP_SIZE, DEPTH_MAP_SIZE),
+            Image.Resampling.NEAREST
+        )
+    )
+    return save_depth_bin(resized, output_dir, frame_id)
+
+
+def write_image(rgb_file: Path, output_dir: Path, frame_id: str,
+                zoom: float = 1.0, img: Optional["Image.Image"] = None) -> str:
+    """
+    Tier 3: save a downscaled RGB JPEG; returns its manifest path.
+
+    zoom > 1 resizes a centered digital-zoom crop instead of the full frame;
+    pass an already-open `img` to reuse one decode for several crops.
+    """
+    if img is None:
+        img = Image.open(rgb_file)
+    box = None
+    if zoom != 1.0:
+        x0, y0, cw, ch = (int(v[0]) for v in zoom_crop_boxes(img.width, img.height, np.array([zoom])))
+        box = (x0, y0, x0 + cw, y0 + ch)
+    img = img.resize(IMAGE_SIZE, Image.Resampling.LANCZOS, box=box)
+    img_out = output_dir / "images" / f"{frame_id}.jpg"
+    img_out.parent.mkdir(parents=True, exist_ok=True)
+    img.save(img_out, quality=85)
+    return f"images/{frame_id}.jpg"
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Zoom / Crop Augmentation
+# ─────────────────────────────────────────────────────────────────────
+
+def zoom_crop_boxes(width: int, height: int, zoom_factors: np.ndarray
+                    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Centered digital-zoom crops of a width x height frame: (x0, y0, cw, ch) arrays."""
+    cw = np.maximum(np.round(width / zoom_factors).astype(int), 1)
+    ch = np.maximum(np.round(height / zoom_factors).astype(int), 1)
+    return (width - cw) // 2, (height - ch) // 2, cw, ch
+
+
+def zoom_intrinsics(intrinsics: Optional[Dict[str, float]], image_width: int,
+                    image_height: int, zoom: float) -> Optional[Dict[str, float]]:
+    """
+    Intrinsics after a centered crop by `zoom` resized back to full resolution:
+    focal lengths scale by zoom, the principal point moves away from center.
+
+    The crop is computed in the intrinsics' own frame — the width/height
+    recorded with them (ARKitScenes lowres_wide), else image_width ×
+    image_height. Returns None if the principal point leaves that frame.
+    """
+    if intrinsics is None:
+        return None
+    width = intrinsics.get("width", image_width)
+    height = intrinsics.get("height", image_height)
+    cx = zoom * intrinsics["cx"] - (zoom - 1.0) * width / 2.0
+    cy = zoom * intrinsics["cy"] - (zoom - 1.0) * height / 2.0
+    if not (0.0 <= cx < width and 0.0 <= cy < height):
+        return None
+
+    zoomed = dict(intrinsics)
+    zoomed.update({
+        "fx": round(intrinsics["fx"] * zoom, 4),
+        "fy": round(intrinsics["fy"] * zoom, 4),
+        "cx": round(cx, 4),
+        "cy": round(cy, 4),
+    })
+    return zoomed
+
+
+def zoom_depth_stats(depth_map: np.ndarray, zoom_factors: List[float],
+                     depth_size: int = 0, patch_radius: int = 2
+                     ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """
+    Center / P25 / P75 (and optionally depth_size² nearest-neighbor depth
+    maps) for every zoom crop of one depth map, in a single vectorized pass.
+
+    Each zoom's values match sample_center_patch / compute_percentiles /
+    a NEAREST resize applied to that crop; invalid statistics are NaN.
+    """
+    h, w = depth_map.shape[:2]
+    zooms = np.asarray(zoom_factors, dtype=np.float64)
+    x0, y0, cw, ch = zoom_crop_boxes(w, h, zooms)
+    nz = len(zooms)
+
+    def valid(v):
+        return (v > 0.1) & (v < 1000.0) & np.isfinite(v)
+
+    # Center patch: 5x5 around each crop's center, clipped to the crop
+    offs = np.arange(-patch_radius, patch_radius + 1)
+    rows = (y0 + ch // 2)[:, None] + offs[None, :]
+    cols = (x0 + cw // 2)[:, None] + offs[None, :]
+    row_ok = (rows >= y0[:, None]) & (rows < (y0 + ch)[:, None])
+    col_ok = (cols >= x0[:, None]) & (cols < (x0 + cw)[:, None])
+    patch = depth_map[np.clip(rows, 0, h - 1)[:, :, None], np.clip(cols, 0, w - 1)[:, None, :]]
+    patch_ok = row_ok[:, :, None] & col_ok[:, None, :] & valid(patch)
+    patch_vals = np.where(patch_ok, patch, np.nan).reshape(nz, -1)
+    centers = np.full(nz, np.nan)
+    has_center = patch_ok.reshape(nz, -1).sum(axis=1) >= 3
+    if has_center.any():
+        centers[has_center] = np.nanmedian(patch_vals[has_center], axis=1)
+
+    # Percentiles: center 30% ROI of each crop, masked out of the union ROI
+    roi_h, roi_w = (ch * 0.3).astype(int), (cw * 0.3).astype(int)
+    ry0, rx0 = y0 + (ch - roi_h) // 2, x0 + (cw - roi_w) // 2
+    uy0, uy1 = ry0.min(), (ry0 + roi_h).max()
+    ux0, ux1 = rx0.min(), (rx0 + roi_w).max()
+    region = depth_map[uy0:uy1, ux0:ux1]
+    ry, rx = np.arange(uy0, uy1), np.arange(ux0, ux1)
+    in_roi = (((ry[None, :] >= ry0[:, None]) & (ry[None, :] < (ry0 + roi_h)[:, None]))[:, :, None]
+              & ((rx[None, :] >= rx0[:, None]) & (rx[None, :] < (rx0 + roi_w)[:, None]))[:, None, :])
+    roi_ok = (in_roi & valid(region)[None]).reshape(nz, -1)
+    p25 = np.full(nz, np.nan)
+    p75 = np.full(nz, np.nan)
+    has_roi = roi_ok.sum(axis=1) >= 10
+    if has_roi.any():
+        roi_vals = np.where(roi_ok[has_roi], region.reshape(1, -1), np.nan)
+        p25[has_roi], p75[has_roi] = np.nanpercentile(roi_vals, [25, 75], axis=1)
+
+    # Downscaled depth: nearest-neighbor sampling at pixel centers (as PIL NEAREST)
+    depth_maps = None
+    if depth_size:
+        d = (np.arange(depth_size) + 0.5) / depth_size
+        src_r = y0[:, None] + np.minimum((d[None, :] * ch[:, None]).astype(int), (ch - 1)[:, None])
+        src_c = x0[:, None] + np.minimum((d[None, :] * cw[:, None]).astype(int), (cw - 1)[:, None])
+        depth_maps = depth_map[src_r[:, :, None], src_c[:, None, :]].astype(np.float32)
+
+    return centers, p25, p75, depth_maps
+
+
+def make_zoom_samples(base: GroundTruthSample, gt_depth_m: np.ndarray,
+                      zoom_factors: List[float], tier: int, output_dir: Path,
+                      rgb_file: Optional[Path] = None) -> List[GroundTruthSample]:
+    """
+    Derive digital-zoom variants of an accepted sample from its decoded GT.
+
+    Variants keep the base frame's LiDAR reading (LiDAR does not zoom) and
+    are marked with zoom_factor / source_frame_id. They do not count
+    toward BAND_TARGETS.
+    """
+    if not zoom_factors:
+        return []
+
+    centers, p25s, p75s, depth_maps = zoom_depth_stats(
+        gt_depth_m, zoom_factors, depth_size=DEPTH_MAP_SIZE if tier >= 2 else 0)
+
+    variants = []
+    for k, zoom in enumerate(zoom_factors):
+        center = centers[k]
+        band = classify_distance(center) if np.isfinite(center) and center >= 0.3 else None
+        if band is None:
+            continue
+
+        intrinsics = zoom_intrinsics(base.intrinsics, base.image_width,
+                                     base.image_height, zoom)
+        if base.intrinsics is not None and intrinsics is None:
+            print(f"  WARNING: {base.frame_id}: principal point leaves the frame "
+                  f"at {zoom:g}x zoom, variant skipped")
+            continue
+
+        frame_id = f"{base.frame_id}_zoom{zoom:g}x"
+        variant = GroundTruthSample(
+            dataset=base.dataset,
+            frame_id=frame_id,
+            ground_truth_center_m=round(float(center), 4),
+            lidar_center_m=base.lidar_center_m,
+            ground_truth_p25_m=round(float(p25s[k]), 4) if np.isfinite(p25s[k]) else None,
+            ground_truth_p75_m=round(float(p75s[k]), 4) if np.isfinite(p75s[k]) else None,
+            intrinsics=intrinsics,
+            image_width=base.image_width,
+            image_height=base.image_height,
+            scene_type=base.scene_type,
+            distance_band=band,
+            source_files=base.source_files,
+            zoom_factor=zoom,
+            source_frame_id=base.frame_id,
+        )
+
+        if depth_maps is not None:
+            variant.depth_map_file = save_depth_bin(depth_maps[k], output_dir, frame_id)
+
+        variants.append(variant)
+
+    if tier >= 3 and Image and rgb_file is not None and variants:
+        with Image.open(rgb_file) as img:
+            for variant in variants:
+                variant.image_file = write_image(
+                    rgb_file, output_dir, variant.frame_id,
+                    zoom=variant.zoom_factor, img=img)
+
+    return variants
+
+
 # ─────────────────────────────────────────────────────────────────────
 # ARKitScenes Processing
 # ─────────────────────────────────────────────────────────────────────
 
+def process_arkitscenes_scene(scene: IndexedScene, data_dir: Path, output_dir: Path,
+                              tier: int, band_counts: Dict[str, int], stats: RunStats,
+                              frames: Optional[List[int]] = None,
+                              known_bands: Optional[Dict[int, Optional[str]]] = None,
+                              stop_when_full: bool = False,
+                              zoom_factors: Optional[List[float]] = None) -> List[GroundTruthSample]:
+    """
+    Extract samples from one ARKitScenes video.
+
+    `frames` restricts extraction to a subset of the scene's candidates.
+    `known_bands` maps frame index -> observed band (None if unusable);
+    frames whose known band is already full are skipped without decoding,
+    and every decoded frame's band is recorded back into it. Each accepted
+    frame also yields its `zoom_factors` digital-zoom variants.
+    """
+    samples = []
+    video_id = scene.scene
+    known_bands = {} if known_bands is None else known_bands
+
+    for i in (scene_candidates(scene) if frames is None else frames):
+        if stop_when_full and bands_full(band_counts):
+            break
+        if i in known_bands:
+            known = known_bands[i]
+            if known is None or band_counts.get(known, 0) >= BAND_TARGETS[known]:
+                continue
+
+        frame_ts = scene.frames[i]
+        depth_file = scene.path(data_dir, "lidar", i)
+
+        try:
+            # Load LiDAR depth (16-bit PNG, values in mm)
+            lidar_img = np.array(Image.open(depth_file))
+            lidar_depth_m = lidar_img.astype(np.float32) / 1000.0
+
+            # Load GT depth
+            stats.decodes += 1
+            gt_depth_m = load_ground_truth(scene, data_dir, i)
+
+            # Sample center
+            gt_center = sample_center_patch(gt_depth_m)
+            valid = gt_center is not None and gt_center >= 0.3
+            band = classify_distance(gt_center) if valid else None
+            known_bands[i] = band
+            if band is None:
+                continue
+
+            lidar_center = sample_center_patch(lidar_depth_m)
+
+            # Check band quota
+            if band_counts.get(band, 0) >= BAND_TARGETS.get(band, 0):
+                continue
+
+            # Percentiles from GT
+            p25, p75 = compute_percentiles(gt_depth_m)
+
+            # Load intrinsics if available
+            intrinsics = None
+            if scene.has("pincam", i):
+                intrinsics = read_pincam(scene.path(data_dir, "pincam", i))
+
+            frame_id = f"arkitscenes_{video_id}_{frame_ts}"
+
+            sample = GroundTruthSample(
+                dataset="arkitscenes",
+                frame_id=frame_id,
+                ground_truth_center_m=round(gt_center, 4),
+                lidar_center_m=round(lidar_center, 4) if lidar_center else None,
+                ground_truth_p25_m=round(p25, 4) if p25 else None,
+                ground_truth_p75_m=round(p75, 4) if p75 else None,
+                intrinsics=intrinsics,
+                image_width=ARKITSCENES_GT_W,
+                image_height=ARKITSCENES_GT_H,
+                scene_type="indoor",
+                distance_band=band,
+                source_files=source_files(scene, i),
+            )
+
+            # Tier 2: Save downscaled depth maps
+            if tier >= 2:
+                sample.depth_map_file = write_depth_map(gt_depth_m, output_dir, frame_id)
+
+            # Tier 3: Save downscaled RGB
+            if tier >= 3 and Image and scene.has("rgb", i):
+                sample.image_file = write_image(
+                    scene.path(data_dir, "rgb", i), output_dir, frame_id)
+
+            samples.append(sample)
+            band_counts[band] = band_counts.get(band, 0) + 1
+
+            rgb_file = scene.path(data_dir, "rgb", i) if scene.has("rgb", i) else None
+            samples.extend(make_zoom_samples(
+                sample, gt_depth_m, zoom_factors, tier, output_dir, rgb_file))
+
+        except Exception as e:
+            continue  # Skip corrupt frames
+
+    return samples
+
+
 def process_arkitscenes(data_dir: Path, output_dir: Path, tier: int,
-                        band_counts: Dict[str, int]) -> List[GroundTruthSample]:
+                        band_counts: Dict[str, int], index: DatasetIndex,
+                        stats: RunStats,
+                        zoom_factors: Optional[List[float]] = None) -> List[GroundTruthSample]:
     """
     Process ARKitScenes 3DOD dataset.
 
@@ -166,6 +878,9 @@ def process_arkitscenes(data_dir: Path, output_dir: Path, tier: int,
                 lowres_wide_intrinsics/ # Per-frame intrinsics
               <video_id>_offline_prepared_data/
                 highres_depth/       # Laser scanner GT depth (1920x1440)
+
+    Frames and companion files come from the dataset index; only the
+    files of frames that are actually decoded are touched.
     """
     samples = []
     scenes_dir = data_dir / "3dod"
@@ -176,132 +891,110 @@ def process_arkitscenes(data_dir: Path, output_dir: Path, tier: int,
         return samples
 
     # Walk through all scenes
-    for split_dir in sorted(scenes_dir.iterdir()):
-        if not split_dir.is_dir():
-            continue
+    for scene in index.scenes_for("arkitscenes"):
+        if bands_full(band_counts):
+            break
+        stats.scenes_processed += 1
+        samples.extend(process_arkitscenes_scene(
+            scene, data_dir, output_dir, tier, band_counts, stats,
+            stop_when_full=True, zoom_factors=zoom_factors))
+
+    return samples
+
 
-        for scene_dir in sorted(split_dir.iterdir()):
-            if not scene_dir.is_dir():
+# ─────────────────────────────────────────────────────────────────────
+# DIODE Processing
+# ─────────────────────────────────────────────────────────────────────
+
+def process_diode_scan(scan: IndexedScene, data_dir: Path, output_dir: Path,
+                       tier: int, band_counts: Dict[str, int], stats: RunStats,
+                       frames: Optional[List[int]] = None,
+                       known_bands: Optional[Dict[int, Optional[str]]] = None,
+                       stop_when_full: bool = False,
+                       zoom_factors: Optional[List[float]] = None) -> List[GroundTruthSample]:
+    """Extract samples from one DIODE scan (see process_arkitscenes_scene)."""
+    samples = []
+    env_type = scan.env_type
+    scene_type = env_type
+    known_bands = {} if known_bands is None else known_bands
+
+    for i in (scene_candidates(scan) if frames is None else frames):
+        if stop_when_full and bands_full(band_counts):
+            break
+        if i in known_bands:
+            known = known_bands[i]
+            if known is None or band_counts.get(known, 0) >= BAND_TARGETS[known]:
                 continue
 
-            video_id = scene_dir.name
-            frames_dir = scene_dir / f"{video_id}_frames"
-            offline_dir = scene_dir / f"{video_id}_offline_prepared_data"
+        frame_stem = scan.frames[i]
 
-            lidar_dir = frames_dir / "lowres_depth" if frames_dir.exists() else None
-            gt_dir = offline_dir / "highres_depth" if offline_dir.exists() else None
-            intrinsics_dir = frames_dir / "lowres_wide_intrinsics" if frames_dir.exists() else None
+        try:
+            stats.decodes += 1
+            depth_map = load_ground_truth(scan, data_dir, i)
 
-            if not lidar_dir or not lidar_dir.exists():
+            gt_center = sample_center_patch(depth_map)
+            valid = gt_center is not None and gt_center >= 0.3
+            band = classify_distance(gt_center) if valid else None
+            known_bands[i] = band
+            if band is None:
                 continue
-            if not gt_dir or not gt_dir.exists():
+
+            if band_counts.get(band, 0) >= BAND_TARGETS.get(band, 0):
                 continue
 
-            # Process every 10th frame (ARKit runs at 60fps, plenty of redundancy)
-            depth_files = sorted(lidar_dir.glob("*.png"))
-            for i, depth_file in enumerate(depth_files):
-                if i % 10 != 0:
-                    continue
+            p25, p75 = compute_percentiles(depth_map)
 
-                frame_ts = depth_file.stem
-                gt_file = gt_dir / f"{frame_ts}.png"
-                if not gt_file.exists():
-                    continue
+            # DIODE standard intrinsics (1024x768)
+            intrinsics = {
+                "fx": 886.81, "fy": 927.06,
+                "cx": 512.0, "cy": 384.0
+            }
 
-                try:
-                    # Load LiDAR depth (16-bit PNG, values in mm)
-                    lidar_img = np.array(Image.open(depth_file))
-                    lidar_depth_m = lidar_img.astype(np.float32) / 1000.0
+            scene_name = scan.scene
+            scan_name = scan.scan
+            frame_id = f"diode_{env_type}_{scene_name}_{scan_name}_{frame_stem}"
 
-                    # Load GT depth (16-bit PNG, values in mm)
-                    gt_img = np.array(Image.open(gt_file))
-                    gt_depth_m = gt_img.astype(np.float32) / 1000.0
-
-                    # Sample center
-                    gt_center = sample_center_patch(gt_depth_m)
-                    if gt_center is None or gt_center < 0.3:
-                        continue
-
-                    lidar_center = sample_center_patch(lidar_depth_m)
-
-                    band = classify_distance(gt_center)
-                    if band is None:
-                        continue
-
-                    # Check band quota
-                    if band_counts.get(band, 0) >= BAND_TARGETS.get(band, 0):
-                        continue
-
-                    # Percentiles from GT
-                    p25, p75 = compute_percentiles(gt_depth_m)
-
-                    # Load intrinsics if available
-                    intrinsics = None
-                    intrinsics_file = intrinsics_dir / f"{frame_ts}.pincam" if intrinsics_dir else None
-                    if intrinsics_file and intrinsics_file.exists():
-                        with open(intrinsics_file) as f:
-                            vals = list(map(float, f.read().strip().split()))
-                            if len(vals) >= 4:
-                                intrinsics = {
-                                    "fx": vals[0], "fy": vals[1],
-                                    "cx": vals[2], "cy": vals[3]
-                                }
-
-                    frame_id = f"arkitscenes_{video_id}_{frame_ts}"
-
-                    sample = GroundTruthSample(
-                        dataset="arkitscenes",
-                        frame_id=frame_id,
-                        ground_truth_center_m=round(gt_center, 4),
-                        lidar_center_m=round(lidar_center, 4) if lidar_center else None,
-                        ground_truth_p25_m=round(p25, 4) if p25 else None,
-                        ground_truth_p75_m=round(p75, 4) if p75 else None,
-                        intrinsics=intrinsics,
-                        image_width=ARKITSCENES_GT_W,
-                        image_height=ARKITSCENES_GT_H,
-                        scene_type="indoor",
-                        distance_band=band,
-                    )
-
-                    # Tier 2: Save downscaled depth maps
-                    if tier >= 2:
-                        depth_out = output_dir / "depth" / f"{frame_id}.bin"
-                        depth_out.parent.mkdir(parents=True, exist_ok=True)
-                        resized = np.array(
-                            Image.fromarray(gt_depth_m).resize(
-                                (DEPTH_MAP_SIZE, DEPTH_MAP_SIZE),
-                                Image.Resampling.NEAREST
-                            )
-                        )
-                        resized.astype(np.float32).tofile(depth_out)
-                        sample.depth_map_file = f"depth/{frame_id}.bin"
-
-                    # Tier 3: Save downscaled RGB
-                    if tier >= 3 and Image:
-                        rgb_dir = frames_dir / "lowres_wide"
-                        rgb_file = rgb_dir / f"{frame_ts}.jpg"
-                        if rgb_file.exists():
-                            img = Image.open(rgb_file).resize(IMAGE_SIZE, Image.Resampling.LANCZOS)
-                            img_out = output_dir / "images" / f"{frame_id}.jpg"
-                            img_out.parent.mkdir(parents=True, exist_ok=True)
-                            img.save(img_out, quality=85)
-                            sample.image_file = f"images/{frame_id}.jpg"
-
-                    samples.append(sample)
-                    band_counts[band] = band_counts.get(band, 0) + 1
+            sample = GroundTruthSample(
+                dataset="diode",
+                frame_id=frame_id,
+                ground_truth_center_m=round(gt_center, 4),
+                lidar_center_m=None,  # DIODE uses laser scanner, not LiDAR
+                ground_truth_p25_m=round(p25, 4) if p25 else None,
+                ground_truth_p75_m=round(p75, 4) if p75 else None,
+                intrinsics=intrinsics,
+                image_width=1024,
+                image_height=768,
+                scene_type=scene_type,
+                distance_band=band,
+                source_files=source_files(scan, i),
+            )
 
-                except Exception as e:
-                    continue  # Skip corrupt frames
+            # Tier 2: depth maps
+            if tier >= 2:
+                sample.depth_map_file = write_depth_map(depth_map, output_dir, frame_id)
 
-    return samples
+            # Tier 3: RGB images
+            if tier >= 3 and Image and scan.has("rgb", i):
+                sample.image_file = write_image(
+                    scan.path(data_dir, "rgb", i), output_dir, frame_id)
 
+            samples.append(sample)
+            band_counts[band] = band_counts.get(band, 0) + 1
+
+            rgb_file = scan.path(data_dir, "rgb", i) if scan.has("rgb", i) else None
+            samples.extend(make_zoom_samples(
+                sample, depth_map, zoom_factors, tier, output_dir, rgb_file))
+
+        except Exception as e:
+            continue
+
+    return samples
 
-# ─────────────────────────────────────────────────────────────────────
-# DIODE Processing
-# ─────────────────────────────────────────────────────────────────────
 
 def process_diode(data_dir: Path, output_dir: Path, tier: int,
-                  band_counts: Dict[str, int]) -> List[GroundTruthSample]:
+                  band_counts: Dict[str, int], index: DatasetIndex,
+                  stats: RunStats,
+                  zoom_factors: Optional[List[float]] = None) -> List[GroundTruthSample]:
     """
     Process DIODE dataset.
 
@@ -315,6 +1008,9 @@ def process_diode(data_dir: Path, output_dir: Path, tier: int,
                   XXXXX.png        # RGB image (1024x768)
                   XXXXX_depth.npy  # Depth map (float64, meters)
                   XXXXX_depth_mask.npy  # Validity mask (bool)
+
+    Scans are visited in index order (val before train, indoor before
+    outdoor), matching the original directory walk.
     """
     samples = []
     diode_dir = data_dir / "diode"
@@ -324,107 +1020,408 @@ def process_diode(data_dir: Path, output_dir: Path, tier: int,
         print(f"  Download from: https://diode-dataset.org")
         return samples
 
-    # Process validation split (smaller, good for testing)
-    for split in ["val", "train"]:
-        split_dir = diode_dir / split
-        if not split_dir.exists():
+    for scan in index.scenes_for("diode"):
+        if bands_full(band_counts):
+            break
+        stats.scenes_processed += 1
+        samples.extend(process_diode_scan(
+            scan, data_dir, output_dir, tier, band_counts, stats,
+            stop_when_full=True, zoom_factors=zoom_factors))
+
+    return samples
+
+
+SCENE_PROCESSORS = {
+    "arkitscenes": process_arkitscenes_scene,
+    "diode": process_diode_scan,
+}
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Quota-Driven Scene Scheduling
+# ─────────────────────────────────────────────────────────────────────
+
+PROBE_FRAMES = 3      # GT frames decoded per scene to estimate its band yield
+SCHEDULE_CHUNK = 10   # Frames processed per scheduling decision
+
+
+def probe_scene(scene: IndexedScene, data_dir: Path, output_dir: Path, tier: int,
+                band_counts: Dict[str, int], stats: RunStats, n_probe: int,
+                zoom_factors: Optional[List[float]] = None
+                ) -> Tuple[Dict[int, Optional[str]], List[GroundTruthSample]]:
+    """
+    Process a few evenly spaced candidate frames of a scene.
+
+    Probes run through the scene processor, so every probed frame is
+    decoded exactly once and becomes a real sample if its band is open.
+    Returns the band observed for each decoded frame (None if unusable)
+    and the accepted samples.
+    """
+    candidates = scene_candidates(scene)
+    known: Dict[int, Optional[str]] = {}
+    if not candidates:
+        return known, []
+
+    picks = np.unique(np.linspace(0, len(candidates) - 1, n_probe).round().astype(int))
+    frames = [candidates[k] for k in picks]
+    decodes_before = stats.decodes
+    samples = SCENE_PROCESSORS[scene.dataset](
+        scene, data_dir, output_dir, tier, band_counts, stats,
+        frames=frames, known_bands=known, stop_when_full=True,
+        zoom_factors=zoom_factors)
+    stats.probe_decodes += stats.decodes - decodes_before
+    return known, samples
+
+
+def estimate_directory_order_decodes(scenes: List[IndexedScene],
+                                     known_bands: List[Dict[int, Optional[str]]]) -> int:
+    """
+    Decodes a directory-order run would need to fill BAND_TARGETS.
+
+    Replays the scenes in directory order with the same bands_full early
+    stop. Frames decoded by the scheduled run contribute their observed
+    band; the rest contribute their scene's observed band mix as an
+    expected (fractional) fill.
+    """
+    bands = list(DISTANCE_BANDS)
+    targets = np.array([BAND_TARGETS[b] for b in bands], dtype=np.float64)
+    counts = np.zeros(len(bands))
+    decodes = 0
+
+    for scene, known in zip(scenes, known_bands):
+        mix = np.zeros(len(bands))
+        for band in known.values():
+            if band is not None:
+                mix[bands.index(band)] += 1
+        if known:
+            mix /= len(known)
+
+        for i in scene_candidates(scene):
+            if (counts >= targets).all():
+                return decodes
+            decodes += 1
+            if i in known:
+                if known[i] is not None:
+                    b = bands.index(known[i])
+                    counts[b] = min(counts[b] + 1, targets[b])
+            else:
+                counts = np.minimum(counts + mix, targets)
+
+    return decodes
+
+
+def _pending_yield(todo: List[int], known: Dict[int, Optional[str]]) -> np.ndarray:
+    """
+    Estimated per-band yield of a scene's unprocessed frames.
+
+    Frames with a known band count exactly; the rest are extrapolated from
+    the band mix of every frame decoded so far in the scene.
+    """
+    bands = list(DISTANCE_BANDS)
+    observed = np.zeros(len(bands))
+    for band in known.values():
+        if band is not None:
+            observed[bands.index(band)] += 1
+
+    yields = np.zeros(len(bands))
+    n_unknown = 0
+    for i in todo:
+        if i in known:
+            if known[i] is not None:
+                yields[bands.index(known[i])] += 1
+        else:
+            n_unknown += 1
+    if known and n_unknown:
+        yields += observed / len(known) * n_unknown
+    return yields
+
+
+def process_quota_scheduled(data_dir: Path, output_dir: Path, tier: int,
+                            band_counts: Dict[str, int], index: DatasetIndex,
+                            stats: RunStats, n_probe: int = PROBE_FRAMES,
+                            chunk: int = SCHEDULE_CHUNK,
+                            zoom_factors: Optional[List[float]] = None,
+                            exhaustive: bool = False) -> List[GroundTruthSample]:
+    """
+    Process scenes from all datasets in the order that fills quotas fastest.
+
+    Every scene is probed first (probe frames are real samples, never
+    decoded twice). Then, repeatedly, the scene with the most
+    quota-useful samples per decode gets its next `chunk` frames processed:
+
+      score = Σ_band min(yield, need) · need / supply  /  frames left
+
+    where `need` is the band's remaining quota and `supply` its estimated
+    yield over all scenes, so bands that only a few scenes can fill
+    (far_mid/far/long from DIODE outdoor) dominate the ordering. Yield
+    estimates are refined from every frame decoded, so a scene whose bands
+    fill up drops out mid-way. The run stops as soon as every band is full,
+    or once no scene is estimated to help; with `exhaustive` the remaining
+    frames run in directory order instead, in case a probe missed something.
+    """
+    scenes = [s for s in index.scenes if scene_candidates(s)]
+    bands = list(DISTANCE_BANDS)
+    targets = np.array([BAND_TARGETS[b] for b in bands], dtype=np.float64)
+    if not scenes:
+        return []
+
+    print(f"  Probing {len(scenes)} scenes ({n_probe} frames each)...")
+    samples = []
+    todo = []
+    known_bands = []
+    yields = np.zeros((len(scenes), len(bands)))
+    for k, scene in enumerate(scenes):
+        known, probe_samples = probe_scene(
+            scene, data_dir, output_dir, tier, band_counts, stats, n_probe,
+            zoom_factors=zoom_factors)
+        samples.extend(probe_samples)
+        todo.append([i for i in scene_candidates(scene) if i not in known])
+        known_bands.append(known)
+        yields[k] = _pending_yield(todo[k], known)
+
+    while not bands_full(band_counts):
+        costs = np.array([len(t) for t in todo], dtype=np.float64)
+        pending = costs > 0
+        if not pending.any():
+            break
+
+        counts = np.array([band_counts.get(b, 0) for b in bands], dtype=np.float64)
+        need = np.maximum(targets - counts, 0.0)
+        supply = yields[pending].sum(axis=0)
+        scarcity = np.where(need > 0, need / np.maximum(supply, 1.0), 0.0)
+        scores = np.full(len(scenes), -1.0)
+        scores[pending] = ((np.minimum(yields[pending], need) * scarcity).sum(axis=1)
+                           / costs[pending])
+
+        k = int(np.argmax(scores))
+        if scores[k] <= 0.0:
+            if not exhaustive:
+                print(f"  No scene is estimated to fill the open bands — stopping "
+                      f"with {int(costs.sum())} frames unvisited (--exhaustive to sweep them)")
+                break
+            k = int(np.argmax(pending))  # First pending scene in directory order
+
+        scene = scenes[k]
+        frames, todo[k] = todo[k][:chunk], todo[k][chunk:]
+        samples.extend(SCENE_PROCESSORS[scene.dataset](
+            scene, data_dir, output_dir, tier, band_counts, stats,
+            frames=frames, known_bands=known_bands[k], stop_when_full=True,
+            zoom_factors=zoom_factors))
+        yields[k] = _pending_yield(todo[k], known_bands[k])
+
+    stats.scenes_processed = len(scenes)  # Every scene was probed
+    stats.directory_order_decodes = estimate_directory_order_decodes(scenes, known_bands)
+    stats.directory_order_estimated = True
+    return samples
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Temporal Sequence Export (ARKitScenes)
+# ─────────────────────────────────────────────────────────────────────
+
+SEQUENCE_LENGTH = 60             # Frames per exported sequence
+SEQUENCE_MAX_GAP_FACTOR = 1.5    # Gap > 1.5x median frame interval breaks a run
+SEQUENCE_FIELDS = ["timestamp_s", "ground_truth_center_m", "lidar_center_m"]
+
+
+@dataclass
+class SequenceRecord:
+    """
+    One contiguous ARKitScenes frame run in sequences.bin.
+
+    The record occupies `num_frames * (3 + depth_size**2)` little-endian
+    float32 values starting at byte `offset`: timestamp_s (relative to
+    t0_s), ground_truth_center_m and lidar_center_m (NaN where the 5x5
+    center patch is invalid), then, if depth_size > 0, num_frames
+    depth_size x depth_size GT depth maps.
+    """
+    sequence_id: str
+    dataset: str
+    video_id: str
+    first_frame: str
+    last_frame: str
+    num_frames: int
+    t0_s: float
+    offset: int
+    depth_size: int = 0
+    intrinsics: Optional[Dict[str, float]] = None
+
+
+def frame_timestamp(stem: str) -> Optional[float]:
+    """ARKitScenes frame stems are <video_id>_<seconds>, e.g. 41069021_305.244."""
+    try:
+        return float(stem.rsplit("_", 1)[-1])
+    except ValueError:
+        return None
+
+
+def find_contiguous_runs(scene: IndexedScene, length: int) -> List[List[int]]:
+    """
+    Split a scene into non-overlapping windows of `length` consecutive frames.
+
+    Frames are walked in timestamp order (stems sort lexically, so
+    <vid>_99.900 would otherwise follow <vid>_106.000). A run breaks at a
+    frame without GT or after a timestamp gap larger than
+    SEQUENCE_MAX_GAP_FACTOR times the scene's median frame interval; frames
+    without a parseable timestamp are skipped. Uses only the index —
+    nothing is decoded.
+    """
+    timed = sorted((t, i) for i, t in
+                   ((i, frame_timestamp(stem)) for i, stem in enumerate(scene.frames))
+                   if t is not None)
+    if len(timed) < 2:
+        return []
+    max_gap = float(np.median(np.diff([t for t, _ in timed]))) * SEQUENCE_MAX_GAP_FACTOR
+
+    windows = []
+    run: List[int] = []
+    last_t = 0.0
+    for t, i in timed:
+        if not scene.has("gt", i):
+            run = []
             continue
+        if run and not 0.0 < t - last_t <= max_gap:
+            run = []
+        run.append(i)
+        last_t = t
+        if len(run) == length:
+            windows.append(run)
+            run = []
+    return windows
+
+
+def export_sequences(data_dir: Path, output_dir: Path, index: DatasetIndex,
+                     length: int = SEQUENCE_LENGTH,
+                     max_sequences: Optional[int] = None,
+                     depth_size: int = 0) -> List[SequenceRecord]:
+    """
+    Export contiguous ARKitScenes frame runs as packed time series.
 
-        for env_type in ["indoor", "outdoor"]:
-            env_dir = split_dir / env_type
-            if not env_dir.exists():
+    Windows are picked round-robin across scenes (so a cap on the number
+    of sequences still spans as many scenes as possible), then decoded in
+    scene order. All records go into a single sequences/sequences.bin;
+    sequences/sequences.json holds the offsets and metadata.
+    """
+    scenes = index.scenes_for("arkitscenes")
+    per_scene = [find_contiguous_runs(scene, length) for scene in scenes]
+
+    selected: List[Tuple[int, List[int]]] = []
+    for round_idx in range(max((len(w) for w in per_scene), default=0)):
+        for k, windows in enumerate(per_scene):
+            if round_idx < len(windows):
+                selected.append((k, windows[round_idx]))
+    if max_sequences is not None:
+        selected = selected[:max_sequences]
+    selected.sort(key=lambda kw: (kw[0], frame_timestamp(scenes[kw[0]].frames[kw[1][0]])))
+    print(f"  {len(selected)} sequences of {length} frames selected "
+          f"from {sum(1 for w in per_scene if w)} scenes")
+
+    seq_dir = output_dir / "sequences"
+    seq_dir.mkdir(parents=True, exist_ok=True)
+    records = []
+    offset = 0
+    dropped = 0
+
+    with open(seq_dir / "sequences.bin", "wb") as blob:
+        for k, frames in selected:
+            scene = scenes[k]
+            n = len(frames)
+            t = np.array([frame_timestamp(scene.frames[i]) for i in frames])
+            gt_center = np.full(n, np.nan, dtype=np.float32)
+            lidar_center = np.full(n, np.nan, dtype=np.float32)
+            depth = np.zeros((n, depth_size, depth_size), dtype=np.float32)
+
+            try:
+                for j, i in enumerate(frames):
+                    gt_depth_m = load_ground_truth(scene, data_dir, i)
+                    lidar_img = np.array(Image.open(scene.path(data_dir, "lidar", i)))
+                    lidar_depth_m = lidar_img.astype(np.float32) / 1000.0
+
+                    gt = sample_center_patch(gt_depth_m)
+                    lidar = sample_center_patch(lidar_depth_m)
+                    gt_center[j] = np.nan if gt is None else gt
+                    lidar_center[j] = np.nan if lidar is None else lidar
+
+                    if depth_size:
+                        depth[j] = np.array(
+                            Image.fromarray(gt_depth_m).resize(
+                                (depth_size, depth_size), Image.Resampling.NEAREST))
+                intrinsics = None
+                if scene.has("pincam", frames[0]):
+                    intrinsics = read_pincam(scene.path(data_dir, "pincam", frames[0]))
+            except Exception as e:
+                dropped += 1  # Skip sequences with corrupt frames
+                if dropped <= 10:
+                    print(f"  WARNING: {scene.scene} @ {scene.frames[frames[0]]}: {e}")
                 continue
 
-            scene_type = env_type
+            packed = np.concatenate([
+                (t - t[0]).astype(np.float32), gt_center, lidar_center, depth.ravel()
+            ]).astype("<f4")
+            blob.write(packed.tobytes())
+
+            first, last = scene.frames[frames[0]], scene.frames[frames[-1]]
+            records.append(SequenceRecord(
+                sequence_id=f"arkitscenes_{scene.scene}_{first}",
+                dataset="arkitscenes",
+                video_id=scene.scene,
+                first_frame=first,
+                last_frame=last,
+                num_frames=n,
+                t0_s=float(t[0]),
+                offset=offset,
+                depth_size=depth_size,
+                intrinsics=intrinsics,
+            ))
+            offset += packed.nbytes
 
-            for scene_dir in sorted(env_dir.iterdir()):
-                if not scene_dir.is_dir():
-                    continue
+    write_sequence_index(records, seq_dir)
+    print(f"  {dropped} sequences dropped (unreadable frames)")
+    return records
 
-                for scan_dir in sorted(scene_dir.iterdir()):
-                    if not scan_dir.is_dir():
-                        continue
-
-                    # Find depth files
-                    depth_files = sorted(scan_dir.glob("*_depth.npy"))
-                    for depth_file in depth_files:
-                        frame_stem = depth_file.stem.replace("_depth", "")
-                        mask_file = scan_dir / f"{frame_stem}_depth_mask.npy"
-
-                        try:
-                            depth_map = np.load(depth_file).squeeze()
-                            if mask_file.exists():
-                                mask = np.load(mask_file).squeeze().astype(bool)
-                                depth_map = np.where(mask, depth_map, 0)
-
-                            gt_center = sample_center_patch(depth_map.astype(np.float32))
-                            if gt_center is None or gt_center < 0.3:
-                                continue
-
-                            band = classify_distance(gt_center)
-                            if band is None:
-                                continue
-
-                            if band_counts.get(band, 0) >= BAND_TARGETS.get(band, 0):
-                                continue
-
-                            p25, p75 = compute_percentiles(depth_map.astype(np.float32))
-
-                            # DIODE standard intrinsics (1024x768)
-                            intrinsics = {
-                                "fx": 886.81, "fy": 927.06,
-                                "cx": 512.0, "cy": 384.0
-                            }
-
-                            scene_name = scene_dir.name
-                            scan_name = scan_dir.name
-                            frame_id = f"diode_{env_type}_{scene_name}_{scan_name}_{frame_stem}"
-
-                            sample = GroundTruthSample(
-                                dataset="diode",
-                                frame_id=frame_id,
-                                ground_truth_center_m=round(gt_center, 4),
-                                lidar_center_m=None,  # DIODE uses laser scanner, not LiDAR
-                                ground_truth_p25_m=round(p25, 4) if p25 else None,
-                                ground_truth_p75_m=round(p75, 4) if p75 else None,
-                                intrinsics=intrinsics,
-                                image_width=1024,
-                                image_height=768,
-                                scene_type=scene_type,
-                                distance_band=band,
-                            )
-
-                            # Tier 2: depth maps
-                            if tier >= 2:
-                                depth_out = output_dir / "depth" / f"{frame_id}.bin"
-                                depth_out.parent.mkdir(parents=True, exist_ok=True)
-                                resized = np.array(
-                                    Image.fromarray(depth_map.astype(np.float32)).resize(
-                                        (DEPTH_MAP_SIZE, DEPTH_MAP_SIZE),
-                                        Image.Resampling.NEAREST
-                                    )
-                                )
-                                resized.astype(np.float32).tofile(depth_out)
-                                sample.depth_map_file = f"depth/{frame_id}.bin"
-
-                            # Tier 3: RGB images
-                            if tier >= 3 and Image:
-                                rgb_file = scan_dir / f"{frame_stem}.png"
-                                if rgb_file.exists():
-                                    img = Image.open(rgb_file).resize(
-                                        IMAGE_SIZE, Image.Resampling.LANCZOS)
-                                    img_out = output_dir / "images" / f"{frame_id}.jpg"
-                                    img_out.parent.mkdir(parents=True, exist_ok=True)
-                                    img.save(img_out, quality=85)
-                                    sample.image_file = f"images/{frame_id}.jpg"
-
-                            samples.append(sample)
-                            band_counts[band] = band_counts.get(band, 0) + 1
-
-                        except Exception as e:
-                            continue
 
-    return samples
+def write_sequence_index(records: List[SequenceRecord], seq_dir: Path):
+    """Write sequences.json describing the records in sequences.bin."""
+    sequence_index = {
+        "version": "1.0.0",
+        "generated_date": datetime.now().isoformat(),
+        "dtype": "float32",
+        "byte_order": "little",
+        "fields": SEQUENCE_FIELDS + ["depth"],
+        "total_sequences": len(records),
+        "total_frames": sum(r.num_frames for r in records),
+        "sequences": [asdict(r) for r in records],
+    }
+
+    output_file = seq_dir / "sequences.json"
+    with open(output_file, "w") as f:
+        json.dump(sequence_index, f, indent=None, separators=(",", ":"))
+
+    size_mb = (seq_dir / "sequences.bin").stat().st_size / 1024 / 1024
+    print(f"\n  Sequences written: {seq_dir} ({len(records)} sequences, {size_mb:.1f} MB)")
+
+
+def iter_sequences(seq_dir: Path):
+    """
+    Stream exported sequences for Python replay.
+
+    Yields (record, arrays) where arrays maps each field name to a
+    float32 view into a memory-mapped sequences.bin (depth is omitted
+    when the export had no depth maps).
+    """
+    with open(seq_dir / "sequences.json") as f:
+        sequence_index = json.load(f)
+    blob = np.memmap(seq_dir / "sequences.bin", dtype="<f4", mode="r")
+
+    for record in sequence_index["sequences"]:
+        n, size = record["num_frames"], record["depth_size"]
+        start = record["offset"] // 4
+        arrays = {name: blob[start + j * n:start + (j + 1) * n]
+                  for j, name in enumerate(SEQUENCE_FIELDS)}
+        if size:
+            depth_start = start + len(SEQUENCE_FIELDS) * n
+            arrays["depth"] = blob[depth_start:depth_start + n * size * size].reshape(n, size, size)
+        yield record, arrays
 
 
 # ─────────────────────────────────────────────────────────────────────
@@ -637,16 +1634,25 @@ def generate_synthetic_manifest(output_dir: Path, seed: int = 42) -> List[Ground
 # Manifest Writer
 # ─────────────────────────────────────────────────────────────────────
 
-def write_manifest(samples: List[GroundTruthSample], output_dir: Path):
-    """Write manifest.json with all samples."""
+def write_manifest(samples: List[GroundTruthSample], output_dir: Path,
+                   source_data_dir: Optional[Path] = None):
+    """
+    Write manifest.json with all samples.
+
+    total_samples and the band counts cover independent frames only;
+    digital-zoom variants are counted separately in zoom_variants.
+    """
+    base = [s for s in samples if s.zoom_factor == 1.0]
     manifest = {
         "version": "1.0.0",
         "generated_date": datetime.now().isoformat(),
+        "source_data_dir": str(source_data_dir.resolve()) if source_data_dir else None,
         "dataset_sources": list(set(s.dataset for s in samples)),
-        "total_samples": len(samples),
+        "total_samples": len(base),
+        "zoom_variants": len(samples) - len(base),
         "distance_bands": {
             name: {"min_m": lo, "max_m": hi, "count": sum(
-                1 for s in samples if s.distance_band == name
+                1 for s in base if s.distance_band == name
             )}
             for name, (lo, hi) in DISTANCE_BANDS.items()
         },
@@ -659,7 +1665,178 @@ def write_manifest(samples: List[GroundTruthSample], output_dir: Path):
 
     size_mb = output_file.stat().st_size / 1024 / 1024
     print(f"\n  Manifest written: {output_file} ({size_mb:.1f} MB)")
-    print(f"  Total samples: {len(samples)}")
+    print(f"  Total samples: {len(base)} (+{len(samples) - len(base)} zoom variants)")
+
+
+def write_run_report(stats: RunStats, band_counts: Dict[str, int], output_dir: Path):
+    """Write run_report.json with decode accounting for a real-data run."""
+    report = {
+        "generated_date": datetime.now().isoformat(),
+        **asdict(stats),
+        "decodes_saved": stats.decodes_saved,
+        "bands": {
+            name: {"count": band_counts.get(name, 0), "target": BAND_TARGETS[name]}
+            for name in DISTANCE_BANDS
+        },
+    }
+
+    output_file = output_dir / "run_report.json"
+    with open(output_file, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n  Run report written: {output_file}")
+    print(f"  GT decodes: {stats.decodes} ({stats.probe_decodes} probes) vs "
+          f"{'~' if stats.directory_order_estimated else ''}"
+          f"{stats.directory_order_decodes} in directory order "
+          f"— saved {stats.decodes_saved}")
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Tier Materialization (upgrade an existing manifest to tier 2/3)
+# ─────────────────────────────────────────────────────────────────────
+
+def _materialize_frame(job: Tuple[str, Dict[str, str], List[Tuple[int, str, float]], str, str, int]
+                       ) -> List[Tuple[int, Optional[str], Optional[str], Optional[str]]]:
+    """
+    Worker: write the tier 2/3 outputs of one source frame and its zoom variants.
+
+    `members` lists (sample position, frame_id, zoom_factor) for every
+    manifest sample cut from the frame. Its GT and RGB are decoded at most
+    once, and all pending zoom crops come from one zoom_depth_stats pass.
+    Outputs that already exist are kept as-is. Returns one
+    (sample position, depth_map_file, image_file, error) per member.
+    """
+    dataset, files, members, data_dir_str, output_dir_str, tier = job
+    data_dir, output_dir = Path(data_dir_str), Path(output_dir_str)
+    with_image = tier >= 3 and "rgb" in files
+
+    try:
+        if tier >= 2:
+            pending = [(fid, zoom) for _, fid, zoom in members
+                       if not (output_dir / "depth" / f"{fid}.bin").exists()]
+            if pending:
+                mask = data_dir / files["mask"] if "mask" in files else None
+                gt_depth_m = load_ground_truth_file(dataset, data_dir / files["depth"], mask)
+                zooms = [zoom for _, zoom in pending if zoom != 1.0]
+                if zooms:
+                    _, _, _, depth_maps = zoom_depth_stats(
+                        gt_depth_m, zooms, depth_size=DEPTH_MAP_SIZE)
+                k = 0
+                for fid, zoom in pending:
+                    if zoom == 1.0:
+                        write_depth_map(gt_depth_m, output_dir, fid)
+                    else:
+                        save_depth_bin(depth_maps[k], output_dir, fid)
+                        k += 1
+
+        if with_image:
+            pending = [(fid, zoom) for _, fid, zoom in members
+                       if not (output_dir / "images" / f"{fid}.jpg").exists()]
+            if pending:
+                rgb_file = data_dir / files["rgb"]
+                with Image.open(rgb_file) as img:
+                    for fid, zoom in pending:
+                        write_image(rgb_file, output_dir, fid, zoom=zoom, img=img)
+    except Exception as e:
+        return [(pos, None, None, f"{fid}: {e}") for pos, fid, _ in members]
+
+    return [(pos,
+             f"depth/{fid}.bin" if tier >= 2 else None,
+             f"images/{fid}.jpg" if with_image else None,
+             None)
+            for pos, fid, _ in members]
+
+
+def materialize_manifest(output_dir: Path, tier: int, data_dir: Optional[Path] = None,
+                         workers: Optional[int] = None) -> int:
+    """
+    Generate depth maps (tier 2) and images (tier 3) for the samples already
+    in output_dir/manifest.json, in parallel, and rewrite the manifest.
+
+    Sample selection is never changed; samples without source_files
+    (synthetic ones, or manifests written before source pointers existed)
+    are left untouched. Returns the number of samples that failed.
+    """
+    manifest_file = output_dir / "manifest.json"
+    with open(manifest_file) as f:
+        manifest = json.load(f)
+
+    if data_dir is None:
+        if not manifest.get("source_data_dir"):
+            print("  ERROR: manifest has no source_data_dir — pass --data-dir")
+            return 1
+        data_dir = Path(manifest["source_data_dir"])
+
+    samples = manifest["samples"]
+
+    # One job per source frame, so zoom variants share their frame's decode
+    frames: Dict[str, Tuple[str, Dict[str, str], List[Tuple[int, str, float]]]] = {}
+    n_jobs = 0
+    for pos, s in enumerate(samples):
+        if not s.get("source_files"):
+            continue
+        key = s.get("source_frame_id") or s["frame_id"]
+        entry = frames.setdefault(key, (s["dataset"], s["source_files"], []))
+        entry[2].append((pos, s["frame_id"], s.get("zoom_factor", 1.0)))
+        n_jobs += 1
+    jobs = [(dataset, files, members, str(data_dir), str(output_dir), tier)
+            for dataset, files, members in frames.values()]
+    print(f"  Materializing tier {tier} for {n_jobs} of {len(samples)} samples "
+          f"from {len(jobs)} source frames "
+          f"({len(samples) - n_jobs} without source files skipped)")
+
+    failures = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for results in pool.map(_materialize_frame, jobs, chunksize=16):
+            for pos, depth_map_file, image_file, error in results:
+                if error:
+                    failures += 1
+                    if failures <= 10:
+                        print(f"  WARNING: {error}")
+                    continue
+                if depth_map_file:
+                    samples[pos]["depth_map_file"] = depth_map_file
+                if image_file:
+                    samples[pos]["image_file"] = image_file
+
+    # Replace atomically so an interrupted run leaves the old manifest intact
+    tmp_path = manifest_file.with_name(manifest_file.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=None, separators=(",", ":"))
+    os.replace(tmp_path, manifest_file)
+
+    print(f"  Manifest updated: {manifest_file} ({failures} failures)")
+    return failures
+
+
+def materialize_main(argv: List[str]) -> int:
+    """`materialize` subcommand: upgrade an existing manifest's tier in place."""
+    parser = argparse.ArgumentParser(
+        prog="prepare_ground_truth_dataset.py materialize",
+        description="Add tier 2/3 outputs to an existing manifest without re-extraction")
+    parser.add_argument("--output", type=str, required=True,
+                        help="Directory containing the manifest.json to upgrade")
+    parser.add_argument("--tier", type=int, required=True, choices=[2, 3],
+                        help="Target tier: 2=+depth, 3=+images")
+    parser.add_argument("--data-dir", type=str, default=None,
+                        help="Dataset directory (default: source_data_dir from the manifest)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+
+    args = parser.parse_args(argv)
+    output_dir = Path(args.output)
+
+    print("=" * 60)
+    print("Rangefinder Ground Truth Tier Materialization")
+    print(f"  Manifest: {output_dir / 'manifest.json'}")
+    print(f"  Tier: {args.tier}")
+    print("=" * 60)
+
+    failures = materialize_manifest(
+        output_dir, args.tier,
+        data_dir=Path(args.data_dir) if args.data_dir else None,
+        workers=args.workers)
+    return 1 if failures else 0
 
 
 # ─────────────────────────────────────────────────────────────────────
@@ -667,8 +1844,15 @@ def write_manifest(samples: List[GroundTruthSample], output_dir: Path):
 # ─────────────────────────────────────────────────────────────────────
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "materialize":
+        sys.exit(materialize_main(sys.argv[2:]))
+
     parser = argparse.ArgumentParser(
-        description="Prepare ground truth dataset for Rangefinder validation")
+        description="Prepare ground truth dataset for Rangefinder validation",
+        epilog="subcommands:\n"
+               "  materialize    upgrade an existing manifest to tier 2/3 in place\n"
+               "                 (see: prepare_ground_truth_dataset.py materialize --help)",
+        formatter_class=argparse.RawDescriptionHelpFormatter)
     parser.add_argument("--output", type=str, required=True,
                         help="Output directory for processed data")
     parser.add_argument("--tier", type=int, default=1, choices=[1, 2, 3],
@@ -679,6 +1863,29 @@ def main():
                         help="Generate synthetic manifest (no dataset download needed)")
     parser.add_argument("--seed", type=int, default=42,
                         help="Random seed for reproducibility")
+    parser.add_argument("--index-cache", type=str, default=None,
+                        help=f"Dataset index cache file (default: <data-dir>/{INDEX_CACHE_NAME})")
+    parser.add_argument("--rebuild-index", action="store_true",
+                        help="Ignore the cached dataset index and walk all trees again")
+    parser.add_argument("--schedule", type=str, default="quota", choices=["quota", "directory"],
+                        help="Scene order: quota=probe scenes and fill scarce bands first, "
+                             "directory=ARKitScenes then DIODE in directory order")
+    parser.add_argument("--probe-frames", type=int, default=PROBE_FRAMES,
+                        help="GT frames decoded per scene by the quota scheduler probe")
+    parser.add_argument("--exhaustive", action="store_true",
+                        help="Quota schedule: once no scene is estimated to help, sweep the "
+                             "remaining frames in directory order instead of stopping")
+    parser.add_argument("--zoom-factors", type=str, default="",
+                        help="Comma-separated digital-zoom factors (>1) to derive extra "
+                             "center-crop samples per accepted frame, e.g. 1.5,2,4")
+    parser.add_argument("--sequences", action="store_true",
+                        help="Export contiguous ARKitScenes frame sequences instead of a manifest")
+    parser.add_argument("--sequence-length", type=int, default=SEQUENCE_LENGTH,
+                        help="Frames per exported sequence")
+    parser.add_argument("--max-sequences", type=int, default=None,
+                        help="Cap on exported sequences (picked round-robin across scenes)")
+    parser.add_argument("--sequence-depth-size", type=int, default=0,
+                        help="Also pack NxN downscaled GT depth per frame (0 = centers only)")
 
     args = parser.parse_args()
     output_dir = Path(args.output)
@@ -691,6 +1898,34 @@ def main():
     print(f"  Seed: {args.seed}")
     print("=" * 60)
 
+    if args.sequences:
+        if args.data_dir is None:
+            parser.error("--sequences requires --data-dir")
+        data_dir = Path(args.data_dir)
+        cache_path = Path(args.index_cache) if args.index_cache else data_dir / INDEX_CACHE_NAME
+
+        print("\nIndexing dataset trees...")
+        index = load_dataset_index(data_dir, cache_path, rebuild=args.rebuild_index)
+
+        print("\nExporting ARKitScenes sequences...")
+        export_sequences(data_dir, output_dir, index,
+                         length=args.sequence_length,
+                         max_sequences=args.max_sequences,
+                         depth_size=args.sequence_depth_size)
+        return
+
+    # Factors that format alike would share a frame_id suffix — keep the first
+    zoom_by_label: Dict[str, float] = {}
+    for text in filter(None, (z.strip() for z in args.zoom_factors.split(","))):
+        try:
+            zoom = float(text)
+        except ValueError:
+            parser.error(f"--zoom-factors: {text!r} is not a number")
+        if not (np.isfinite(zoom) and zoom > 1.0):
+            parser.error("--zoom-factors must all be > 1")
+        zoom_by_label.setdefault(f"{zoom:g}", zoom)
+    zoom_factors = list(zoom_by_label.values())
+
     band_counts = {band: 0 for band in DISTANCE_BANDS}
     all_samples = []
 
@@ -701,23 +1936,46 @@ def main():
         all_samples = generate_synthetic_manifest(output_dir, seed=args.seed)
     else:
         data_dir = Path(args.data_dir)
-
-        # Process ARKitScenes
-        print("\nProcessing ARKitScenes...")
-        ark_samples = process_arkitscenes(data_dir, output_dir, args.tier, band_counts)
-        all_samples.extend(ark_samples)
-        print(f"  Extracted {len(ark_samples)} samples from ARKitScenes")
-
-        # Process DIODE
-        print("\nProcessing DIODE...")
-        diode_samples = process_diode(data_dir, output_dir, args.tier, band_counts)
-        all_samples.extend(diode_samples)
-        print(f"  Extracted {len(diode_samples)} samples from DIODE")
+        cache_path = Path(args.index_cache) if args.index_cache else data_dir / INDEX_CACHE_NAME
+
+        print("\nIndexing dataset trees...")
+        index = load_dataset_index(data_dir, cache_path, rebuild=args.rebuild_index)
+
+        stats = RunStats(schedule=args.schedule, scenes_total=len(index.scenes))
+
+        if args.schedule == "quota":
+            print("\nProcessing scenes in quota-driven order...")
+            all_samples = process_quota_scheduled(
+                data_dir, output_dir, args.tier, band_counts, index, stats,
+                n_probe=args.probe_frames, zoom_factors=zoom_factors,
+                exhaustive=args.exhaustive)
+        else:
+            # Process ARKitScenes
+            print("\nProcessing ARKitScenes...")
+            all_samples.extend(process_arkitscenes(
+                data_dir, output_dir, args.tier, band_counts, index, stats,
+                zoom_factors=zoom_factors))
+
+            # Process DIODE
+            print("\nProcessing DIODE...")
+            all_samples.extend(process_diode(
+                data_dir, output_dir, args.tier, band_counts, index, stats,
+                zoom_factors=zoom_factors))
+            stats.directory_order_decodes = stats.decodes
+
+        for ds, name in [("arkitscenes", "ARKitScenes"), ("diode", "DIODE")]:
+            n = sum(1 for s in all_samples if s.dataset == ds and s.zoom_factor == 1.0)
+            print(f"  Extracted {n} samples from {name}")
+        if zoom_factors:
+            n = sum(1 for s in all_samples if s.zoom_factor != 1.0)
+            print(f"  Derived {n} zoom variants ({', '.join(f'{z:g}x' for z in zoom_factors)})")
+        write_run_report(stats, band_counts, output_dir)
 
         # If not enough real data, fill with synthetic
         total_target = sum(BAND_TARGETS.values())
-        if len(all_samples) < total_target * 0.8:
-            print(f"\n  Only {len(all_samples)} real samples — filling remaining with synthetic...")
+        n_real = sum(1 for s in all_samples if s.zoom_factor == 1.0)
+        if n_real < total_target * 0.8:
+            print(f"\n  Only {n_real} real samples — filling remaining with synthetic...")
             synthetic = generate_synthetic_manifest(output_dir, seed=args.seed)
             # Filter to unfilled bands
             for s in synthetic:
@@ -727,23 +1985,25 @@ def main():
                     band_counts[band] = band_counts.get(band, 0) + 1
 
     # Write manifest
-    write_manifest(all_samples, output_dir)
+    write_manifest(all_samples, output_dir,
+                   source_data_dir=None if args.synthetic or args.data_dir is None else Path(args.data_dir))
 
-    # Summary
+    # Summary (independent frames, matching the manifest's total_samples)
+    base_samples = [s for s in all_samples if s.zoom_factor == 1.0]
     print("\n" + "=" * 60)
     print("Dataset preparation complete!")
-    print(f"  Total samples: {len(all_samples)}")
+    print(f"  Total samples: {len(base_samples)}")
     print(f"  Distance range: {min(s.ground_truth_center_m for s in all_samples):.2f}m "
           f"– {max(s.ground_truth_center_m for s in all_samples):.2f}m")
 
     dataset_counts = {}
-    for s in all_samples:
+    for s in base_samples:
         dataset_counts[s.dataset] = dataset_counts.get(s.dataset, 0) + 1
     for ds, count in sorted(dataset_counts.items()):
         print(f"  {ds}: {count} samples")
 
     scene_counts = {}
-    for s in all_samples:
+    for s in base_samples:
         scene_counts[s.scene_type] = scene_counts.get(s.scene_type, 0) + 1
     for st, count in sorted(scene_counts.items()):
         print(f"  {st}: {count} samples")